@@ -5,6 +5,9 @@ import sys
 from src.discovery import start_discovery, PEERS
 from src.server import file_receiver, choose_save_location, get_save_path, set_save_path, chat_server
 from src.client import file_sender, chat_client
+from src.chat_hub import stop_chat_hubs
+from src.udp_transfer import udp_file_sender, udp_file_receiver
+from utils.framing import send_message, recv_message
 
 def main():
     print("Welcome to PyDrop!")
@@ -29,6 +32,14 @@ def main():
     )
     receiver_thread.start()
 
+    # Loss-tolerant UDP receiver for transfers over lossy Wi-Fi
+    udp_receiver_thread = threading.Thread(
+        target=udp_file_receiver,
+        kwargs={'save_path_func': get_save_path},
+        daemon=True
+    )
+    udp_receiver_thread.start()
+
     try:
         while True:
             print("\n--- MENU ---")
@@ -86,8 +97,11 @@ def main():
                     print("Path is not a file.")
                     continue
 
+                mode = input("Transfer mode: (t)cp, or (u)dp for lossy Wi-Fi [t]: ").strip().lower()
+                sender = udp_file_sender if mode == 'u' else file_sender
+
                 print(f"Sending file to {valid_peers[peer_ip]['name']} ({peer_ip})...")
-                send_thread = threading.Thread(target=file_sender, args=(peer_ip, file_path))
+                send_thread = threading.Thread(target=sender, args=(peer_ip, file_path))
                 send_thread.start()
                 send_thread.join()
 
@@ -148,11 +162,14 @@ def main():
                 chat_port = int(input("Enter chat port: ").strip())
                 choice_chat = input("Host or Join chat? (h/j): ").strip().lower()
                 if choice_chat == 'h':
-                    print(f"Starting chat server on port {chat_port}... (type '/exit' to quit chat)")
+                    print(f"Starting chat hub on port {chat_port}... (type '/exit' to quit chat)")
                     try:
                         chat_server(chat_port)
                     except Exception as e:
                         print(f"Chat server error: {e}")
+                        continue
+                    # The hub keeps serving other peers after we leave the chat
+                    start_chat_client('127.0.0.1', chat_port)
                 elif choice_chat == 'j':
                     print(f"Connecting to chat at {peer_ip}:{chat_port}... (type '/exit' to quit chat)")
                     try:
@@ -171,6 +188,8 @@ def main():
 
     except KeyboardInterrupt:
         print("\nExiting PyDrop. Goodbye!")
+    finally:
+        stop_chat_hubs()
 
 def start_chat_client(peer_ip, chat_port):
     """Start a chat client session with a peer."""
@@ -181,14 +200,11 @@ def start_chat_client(peer_ip, chat_port):
         def receive_messages():
             try:
                 while True:
-                    data = sock.recv(1024)
-                    if not data:
-                        break
-                    message = data.decode()
-                    if message.strip() == '/exit':
-                        print("\n[Peer disconnected]")
+                    message = recv_message(sock)
+                    if message is None:
+                        print("\n[Disconnected from chat]")
                         break
-                    print(f"\n[Peer]: {message}")
+                    print(f"\n{message}")
                     print("You: ", end="", flush=True)
             except Exception as e:
                 print(f"\n[Connection lost: {e}]")
@@ -201,10 +217,11 @@ def start_chat_client(peer_ip, chat_port):
         while True:
             try:
                 message = input("You: ")
+                send_message(sock, message)
                 if message.strip() == '/exit':
-                    sock.sendall(message.encode())
                     break
-                sock.sendall(message.encode())
+            except ValueError as e:
+                print(f"Message not sent: {e}")
             except KeyboardInterrupt:
                 break
             except Exception as e:
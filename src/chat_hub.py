@@ -0,0 +1,320 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from utils.framing import encode_message, read_message, MAX_MESSAGE_SIZE
+
+CHAT_PORT = 50002
+DEFAULT_ROOM = 'lobby'
+BATCH_BYTES = 8192      # Most bytes coalesced into a single write
+BATCH_DELAY = 0.005     # Seconds to wait for more small messages before flushing
+SEND_RATE = 64 * 1024   # Bytes per second delivered to each session
+MAX_PENDING = 1024      # Queued messages per session before the oldest are dropped
+MAX_NAME_LENGTH = 32    # Longest nickname or room name, in UTF-8 bytes
+# Leaves room for the "[room] name: " prefix the hub adds when relaying a message
+MAX_TEXT_SIZE = MAX_MESSAGE_SIZE - 2 * MAX_NAME_LENGTH - 16
+
+HELP_TEXT = ("* Commands: /nick NAME, /join ROOM, /rooms, /who, "
+             "/msg NAME TEXT, /help, /exit")
+
+_HUBS = {}
+_HUBS_LOCK = threading.Lock()
+
+
+def fit_message(message):
+    """Truncates a message so that it always fits in one frame."""
+    payload = message.encode('utf-8')
+    if len(payload) <= MAX_MESSAGE_SIZE:
+        return message
+    marker = ' [truncated]'
+    # Cutting mid-character leaves a partial sequence that errors='ignore' drops
+    return payload[:MAX_MESSAGE_SIZE - len(marker)].decode('utf-8', errors='ignore') + marker
+
+
+class RateLimiter:
+    """Token bucket that limits how many bytes per second are delivered."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, amount):
+        """Waits until amount bytes may be sent."""
+        amount = min(amount, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class ChatSession:
+    """One connected peer: its name, room and batched outbound queue."""
+
+    def __init__(self, reader, writer, send_rate=SEND_RATE):
+        self.reader = reader
+        self.writer = writer
+        host, port = writer.get_extra_info('peername')[:2]
+        self.name = f"{host}:{port}"
+        self.room = None
+        self.outbox = deque()
+        self.ready = asyncio.Event()
+        self.limiter = RateLimiter(send_rate)
+        self.closed = False
+        self.flusher = None
+
+    def send(self, message):
+        """Queues a message for delivery without blocking the event loop."""
+        if self.closed:
+            return
+        if len(self.outbox) >= MAX_PENDING:
+            # Slow reader: drop the oldest message rather than grow without bound
+            self.outbox.popleft()
+        self.outbox.append(encode_message(fit_message(message)))
+        self.ready.set()
+
+    def close(self):
+        """Stops accepting messages; anything already queued is still flushed."""
+        self.closed = True
+        self.ready.set()
+
+    async def flush_loop(self):
+        """Writes queued messages, coalescing small ones and pacing to the send rate."""
+        try:
+            while True:
+                await self.ready.wait()
+                self.ready.clear()
+                if self.outbox and not self.closed:
+                    # Give back-to-back messages a moment to pile up into one write
+                    await asyncio.sleep(BATCH_DELAY)
+                while self.outbox:
+                    batch = [self.outbox.popleft()]
+                    size = len(batch[0])
+                    while self.outbox and size + len(self.outbox[0]) <= BATCH_BYTES:
+                        frame = self.outbox.popleft()
+                        batch.append(frame)
+                        size += len(frame)
+                    await self.limiter.acquire(size)
+                    self.writer.write(b''.join(batch))
+                    await self.writer.drain()
+                if self.closed:
+                    break
+        except (ConnectionError, OSError):
+            self.closed = True
+            self.outbox.clear()
+
+
+class ChatHub:
+    """Serves many chat sessions and group rooms from a single asyncio event loop."""
+
+    def __init__(self, port=CHAT_PORT, host='0.0.0.0', send_rate=SEND_RATE):
+        self.port = port
+        self.host = host
+        self.send_rate = send_rate
+        self.rooms = {}       # room name -> set of sessions
+        self.sessions = set()
+        self.tasks = set()    # handle_client tasks still running
+        self.loop = None
+        self.server = None
+        self.error = None
+        self._thread = None
+        self._started = threading.Event()
+
+    def start(self):
+        """Runs the hub in a background thread and returns once it is listening."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self.error:
+            raise self.error
+        print(f"[+] Chat hub listening on port {self.port}")
+
+    def stop(self):
+        """Disconnects every session and stops the event loop."""
+        if self.loop is None or not self.loop.is_running():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        try:
+            future.result(timeout=5)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle_client, self.host, self.port, reuse_address=True)
+            )
+        except Exception as e:
+            self.error = e
+            self._started.set()
+            self.loop.close()
+            return
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _shutdown(self):
+        self.server.close()
+        sessions = list(self.sessions)
+        for session in sessions:
+            session.send("* Chat hub shutting down")
+            session.close()
+        flushers = [session.flusher for session in sessions if session.flusher]
+        if flushers:
+            await asyncio.wait(flushers, timeout=1)
+
+        # Closing the transports ends each session's read loop so handle_client can clean up
+        for session in sessions:
+            session.writer.close()
+        if self.tasks:
+            _, pending = await asyncio.wait(list(self.tasks), timeout=2)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        session = ChatSession(reader, writer, self.send_rate)
+        self.sessions.add(session)
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        session.flusher = asyncio.create_task(session.flush_loop())
+        print(f"[+] Chat connection from {session.name}")
+
+        session.send(f"* Welcome! You are {session.name}.")
+        session.send(HELP_TEXT)
+        self.join(session, DEFAULT_ROOM)
+        try:
+            while not session.closed:
+                message = await read_message(reader)
+                if message is None or not self.handle_message(session, message):
+                    break
+        except (ConnectionError, ValueError) as e:
+            print(f"[-] Chat connection error from {session.name}: {e}")
+        finally:
+            self.leave(session)
+            self.sessions.discard(session)
+            session.close()
+            try:
+                await session.flusher
+                writer.close()
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                self.tasks.discard(task)
+            print(f"[+] Chat session {session.name} closed")
+
+    def handle_message(self, session, message):
+        """Handles one incoming message; returns False when the session should end."""
+        text = message.strip()
+        if not text:
+            return True
+        if len(text.encode('utf-8')) > MAX_TEXT_SIZE:
+            session.send(f"* Message too long (max {MAX_TEXT_SIZE} bytes)")
+            return True
+        if not text.startswith('/'):
+            self.broadcast(session.room, f"[{session.room}] {session.name}: {text}", exclude=session)
+            return True
+
+        command, _, arg = text.partition(' ')
+        arg = arg.strip()
+        if command == '/exit':
+            return False
+        elif command == '/nick':
+            self.rename(session, arg)
+        elif command == '/join':
+            if arg and len(arg.encode('utf-8')) <= MAX_NAME_LENGTH:
+                self.join(session, arg)
+            else:
+                session.send(f"* Usage: /join ROOM (at most {MAX_NAME_LENGTH} bytes)")
+        elif command == '/rooms':
+            rooms = ', '.join(f"{name} ({len(members)})" for name, members in sorted(self.rooms.items()))
+            session.send(f"* Rooms: {rooms}")
+        elif command == '/who':
+            names = ', '.join(sorted(s.name for s in self.rooms.get(session.room, ())))
+            session.send(f"* In {session.room}: {names}")
+        elif command == '/msg':
+            target_name, _, body = arg.partition(' ')
+            target = self.find_session(target_name)
+            if target is None or not body.strip():
+                session.send("* Usage: /msg NAME TEXT (NAME must be connected)")
+            else:
+                target.send(f"[private] {session.name}: {body.strip()}")
+        elif command == '/help':
+            session.send(HELP_TEXT)
+        else:
+            session.send(f"* Unknown command {command}. {HELP_TEXT[2:]}")
+        return True
+
+    def find_session(self, name):
+        for session in self.sessions:
+            if session.name == name:
+                return session
+        return None
+
+    def rename(self, session, name):
+        if not name or ' ' in name or len(name.encode('utf-8')) > MAX_NAME_LENGTH:
+            session.send(f"* Usage: /nick NAME (no spaces, at most {MAX_NAME_LENGTH} bytes)")
+        elif self.find_session(name) is not None:
+            session.send(f"* The name {name} is already taken")
+        else:
+            old_name = session.name
+            session.name = name
+            self.broadcast(session.room, f"* {old_name} is now known as {name}")
+
+    def join(self, session, room):
+        if session.room == room:
+            session.send(f"* Already in {room}")
+            return
+        self.leave(session)
+        session.room = room
+        self.rooms.setdefault(room, set()).add(session)
+        self.broadcast(room, f"* {session.name} joined {room}")
+
+    def leave(self, session):
+        room = session.room
+        if room is None:
+            return
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(session)
+            if not members:
+                del self.rooms[room]
+        session.room = None
+        self.broadcast(room, f"* {session.name} left {room}")
+
+    def broadcast(self, room, message, exclude=None):
+        for session in self.rooms.get(room, ()):
+            if session is not exclude:
+                session.send(message)
+
+
+def start_chat_hub(port=CHAT_PORT):
+    """Returns the running chat hub for port, starting it in the background if needed."""
+    with _HUBS_LOCK:
+        hub = _HUBS.get(port)
+        if hub is None or not hub.loop.is_running():
+            hub = ChatHub(port)
+            hub.start()
+            _HUBS[port] = hub
+        return hub
+
+
+def stop_chat_hubs():
+    """Stops every chat hub started by start_chat_hub."""
+    with _HUBS_LOCK:
+        hubs = list(_HUBS.values())
+        _HUBS.clear()
+    for hub in hubs:
+        hub.stop()
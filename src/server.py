@@ -5,6 +5,7 @@ import struct
 import tkinter as tk
 from tkinter import filedialog
 from utils.crypto import encrypt_file, decrypt_file, get_key
+from src.chat_hub import start_chat_hub
 
 HOST = ''
 PORT = 50001  # Default port
@@ -113,61 +114,5 @@ def handle_file_transfer(conn, addr, save_path_func, on_file_received, on_transf
         conn.close()
 
 def chat_server(port=50002):
-    """Starts a simple chat server for incoming peer messages."""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    
-    try:
-        # For localhost testing, bind to specific address
-        sock.bind(('0.0.0.0', port))
-        sock.listen(1)
-        print(f"[+] Chat server listening on port {port}")
-        print("Waiting for incoming chat connection...")
-        
-        conn, addr = sock.accept()
-        print(f"[+] Chat connection from {addr[0]}:{addr[1]}")
-        print("Chat started! Type '/exit' to quit.")
-        
-        def receive_messages():
-            try:
-                while True:
-                    data = conn.recv(1024)
-                    if not data:
-                        break
-                    message = data.decode().strip()
-                    if message == '/exit':
-                        print("\n[Peer disconnected]")
-                        break
-                    print(f"\n[Peer]: {message}")
-                    print("You: ", end="", flush=True)
-            except Exception as e:
-                print(f"\n[Connection error: {e}]")
-        
-        # Start receiving thread
-        receive_thread = threading.Thread(target=receive_messages, daemon=True)
-        receive_thread.start()
-        
-        # Main chat loop
-        try:
-            while True:
-                response = input("You: ")
-                if response.strip() == '/exit':
-                    conn.sendall(response.encode())
-                    break
-                conn.sendall(response.encode())
-        except KeyboardInterrupt:
-            print("\n[Chat interrupted]")
-        except Exception as e:
-            print(f"[Chat error: {e}]")
-            
-    except Exception as e:
-        print(f"[-] Chat server error: {e}")
-    finally:
-        try:
-            conn.close()
-        except:
-            pass
-        try:
-            sock.close()
-        except:
-            pass
\ No newline at end of file
+    """Starts the multi-peer chat hub on port in the background and returns it."""
+    return start_chat_hub(port)
@@ -0,0 +1,638 @@
+import heapq
+import os
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from tqdm import tqdm
+from src.server import get_save_path
+from utils.crypto import encrypt_chunk, decrypt_chunk, get_key, TAG_SIZE
+from utils.fec import xor_parity, recover_missing
+from utils.file_utils import get_file_size, sanitize_filename, unique_path
+
+HOST = ''
+UDP_PORT = 50003
+CHUNK_SIZE = 1200             # Plaintext bytes per datagram, keeps packets under a 1500-byte MTU
+FEC_GROUP = 8                 # Data chunks covered by each parity packet (0 disables FEC)
+WINDOW = 1024                 # Most chunks in flight past the first unacked one; also the SACK bitmap width
+INITIAL_RATE = 1024 * 1024    # Bytes per second the sender starts pacing at
+MIN_RATE = 64 * 1024
+MAX_RATE = 100 * 1024 * 1024
+LOSS_TOLERANCE = 0.1          # Most steady unrepaired loss treated as random rather than congestion
+LOSS_MARGIN = 0.02            # Loss over twice the baseline plus this margin is read as congestion
+RATE_SAMPLE = 100             # Fewest chunks sent in an interval before its loss rate is judged
+DELAY_TOLERANCE = 1.25        # RTT this many times the minimum (plus DELAY_SLACK) means a queue is building
+DELAY_SLACK = 0.01
+RATE_GAIN = 1.25              # Rate increase per interval while the path shows no congestion
+BACKOFF = 0.85                # Fraction of the delivery rate to drop to on congestion
+REORDER_THRESHOLD = 3         # How far acks must run past a hole's FEC group before it is resent
+BURST_ALLOWANCE = 0.002       # Seconds of sending the pacer may catch up on at once
+SACK_EVERY = 16               # The receiver acks after this many datagrams...
+SACK_INTERVAL = 0.02          # ...or after this many seconds, whichever comes first
+HANDSHAKE_RETRIES = 5
+HANDSHAKE_TIMEOUT = 2.0
+IDLE_TIMEOUT = 10.0
+MAX_FILE_SIZE = 64 * 1024 ** 3  # Largest file accepted
+MAX_CHUNKS = -(-MAX_FILE_SIZE // CHUNK_SIZE)  # Bounds the receiver's per-chunk bookkeeping and fits the 32-bit seq
+MAX_TRANSFERS = 4             # Most incoming transfers the receiver keeps open at once
+
+HELLO, ACCEPT, DATA, PARITY, SACK, DONE, REJECT = range(1, 8)
+
+HEADER = struct.Struct('!BII')        # Packet type, transfer id, sequence number
+HELLO_INFO = struct.Struct('!QIH8s')  # File size, chunk size, FEC group size, nonce prefix
+SACK_INFO = struct.Struct('!II')      # Highest sequence received, sequence that triggered the ack
+
+
+def chunk_count(file_size, chunk_size=CHUNK_SIZE):
+    """Returns how many chunks a file is split into (an empty file is one empty chunk)."""
+    return max(1, -(-file_size // chunk_size))
+
+
+def check_hello(file_size, chunk_size, fec_group):
+    """Returns why a transfer request's parameters are unacceptable, or None if they are fine."""
+    if not 0 < chunk_size <= CHUNK_SIZE:
+        return f"chunk size {chunk_size} is outside 1-{CHUNK_SIZE}"
+    if file_size > MAX_FILE_SIZE:
+        return f"file size {file_size} is over the {MAX_FILE_SIZE} byte limit"
+    if chunk_count(file_size, chunk_size) > MAX_CHUNKS:
+        return f"{chunk_count(file_size, chunk_size)} chunks is over the {MAX_CHUNKS} chunk limit"
+    if fec_group > WINDOW:
+        return f"FEC group {fec_group} is larger than the {WINDOW} chunk window"
+    return None
+
+
+class LossyChannel:
+    """
+    Wraps a UDP socket and injects loss, latency and jitter into what it sends.
+
+    Lets the datagram transport be benchmarked over loopback as if it were
+    running on a congested Wi-Fi link. With bandwidth set (bytes per second),
+    packets also pass through a drop-tail bottleneck queue of queue_limit
+    bytes, so sending too fast shows up as rising delay and then loss.
+    Everything except sendto is passed through to the wrapped socket.
+    """
+
+    def __init__(self, sock, loss=0.0, latency=0.0, jitter=0.0, bandwidth=0, queue_limit=64 * 1024, seed=None):
+        self.sock = sock
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.queue_limit = queue_limit
+        self._link_free = 0.0  # When the bottleneck finishes sending what is already queued
+        self.random = random.Random(seed)
+        self._queue = []  # (due time, counter, data, addr)
+        self._counter = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def sendto(self, data, addr):
+        if self.random.random() < self.loss:
+            return len(data)
+        now = time.monotonic()
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if self.bandwidth:
+            departure = max(now, self._link_free) + len(data) / self.bandwidth
+            if (departure - now) * self.bandwidth > self.queue_limit:
+                return len(data)  # Bottleneck queue is full
+            self._link_free = departure
+            delay += departure - now
+        if delay <= 0:
+            return self.sock.sendto(data, addr)
+        with self._cond:
+            self._counter += 1
+            heapq.heappush(self._queue, (now + delay, self._counter, data, addr))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._deliver, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return len(data)
+
+    def _deliver(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                wait = self._queue[0][0] - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                _, _, data, addr = heapq.heappop(self._queue)
+            try:
+                self.sock.sendto(data, addr)
+            except OSError:
+                pass  # Socket closed while packets were still delayed
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+def _make_channel(sock, loss, latency, bandwidth=0):
+    if loss or latency or bandwidth:
+        return LossyChannel(sock, loss=loss, latency=latency, jitter=latency / 2, bandwidth=bandwidth)
+    return sock
+
+
+def _drain(sock, limit=256):
+    """Returns the datagrams already waiting on a non-blocking socket."""
+    packets = []
+    while len(packets) < limit:
+        try:
+            packets.append(sock.recvfrom(65535))
+        except (BlockingIOError, InterruptedError):
+            break
+        except ConnectionError:
+            continue  # ICMP port unreachable from an earlier send
+    return packets
+
+
+class OutgoingTransfer:
+    """Sender-side state: what is in flight, what is acked, and the pacing rate."""
+
+    def __init__(self, f, file_size, transfer_id, key, nonce_prefix, fec_group):
+        self.f = f
+        self.file_size = file_size
+        self.transfer_id = transfer_id
+        self.key = key
+        self.nonce_prefix = nonce_prefix
+        self.fec_group = fec_group
+        self.total = chunk_count(file_size)
+        self.acked = bytearray(self.total)
+        self.cum = 0                # Every chunk below this one is acked
+        self.next_new = 0           # Next chunk that has never been sent
+        self.payloads = {}          # seq -> encrypted payload, for chunks still in flight
+        self.sent_at = {}           # seq -> when the chunk was last sent
+        self.retransmitted = set()
+        self.lost = deque()
+        self.queued = set()
+        self.pending_parity = None
+        self.rate = INITIAL_RATE
+        self.srtt = None
+        self.min_rtt = None
+        self.loss_baseline = 0.0
+        self.last_progress = time.monotonic()
+        self.interval_start = self.last_progress
+        self.interval_sent = 0
+        self.interval_lost = 0
+        self.interval_delivered = 0
+        self.interval_rtt = None    # Lowest RTT sample this interval
+        self.done = False
+
+    def chunk_length(self, seq):
+        return min(CHUNK_SIZE, self.file_size - seq * CHUNK_SIZE)
+
+    def payload(self, seq):
+        payload = self.payloads.get(seq)
+        if payload is None:
+            self.f.seek(seq * CHUNK_SIZE)
+            payload = encrypt_chunk(self.f.read(CHUNK_SIZE), self.key, self.nonce_prefix, seq)
+            if not self.acked[seq]:
+                self.payloads[seq] = payload
+        return payload
+
+    def rto(self):
+        return max(0.2, 4 * self.srtt) if self.srtt else 1.0
+
+    def next_packet(self, now):
+        """Returns the next datagram to send, or None if there is nothing to send yet."""
+        while self.lost:
+            seq = self.lost.popleft()
+            self.queued.discard(seq)
+            if not self.acked[seq]:
+                self.retransmitted.add(seq)
+                self.sent_at[seq] = now
+                return HEADER.pack(DATA, self.transfer_id, seq) + self.payload(seq)
+
+        if self.pending_parity is not None:
+            group = self.pending_parity
+            self.pending_parity = None
+            members = range(group * self.fec_group, min((group + 1) * self.fec_group, self.total))
+            parity = xor_parity([self.payload(seq) for seq in members])
+            return HEADER.pack(PARITY, self.transfer_id, group) + parity
+
+        if self.next_new < self.total and self.next_new - self.cum < WINDOW:
+            seq = self.next_new
+            self.next_new += 1
+            self.sent_at[seq] = now
+            self.interval_sent += 1
+            if self.fec_group and ((seq + 1) % self.fec_group == 0 or seq == self.total - 1):
+                self.pending_parity = seq // self.fec_group
+            return HEADER.pack(DATA, self.transfer_id, seq) + self.payload(seq)
+
+        # Nothing new can go out: if acks have stalled, resend whatever is still unacked
+        if now - self.last_progress > self.rto():
+            self.last_progress = now
+            for seq in range(self.cum, self.next_new):
+                if not self.acked[seq] and seq not in self.queued:
+                    self.lost.append(seq)
+                    self.queued.add(seq)
+            self.rate = max(MIN_RATE, self.rate * 0.5)
+        return None
+
+    def ack(self, seq):
+        """Marks a chunk as delivered and returns its size, or 0 if it already was."""
+        if seq >= self.total or self.acked[seq]:
+            return 0
+        self.acked[seq] = 1
+        self.payloads.pop(seq, None)
+        self.sent_at.pop(seq, None)
+        return self.chunk_length(seq)
+
+    def on_sack(self, cum, body, now):
+        """Applies a selective ack and returns how many new bytes it acknowledged."""
+        highest, echo = SACK_INFO.unpack_from(body)
+        bitmap = body[SACK_INFO.size:]
+
+        sent = self.sent_at.get(echo)
+        if sent is not None and echo not in self.retransmitted:
+            sample = now - sent
+            self.srtt = sample if self.srtt is None else 0.875 * self.srtt + 0.125 * sample
+            self.min_rtt = sample if self.min_rtt is None else min(self.min_rtt, sample)
+            self.interval_rtt = sample if self.interval_rtt is None else min(self.interval_rtt, sample)
+
+        delivered = 0
+        for seq in range(self.cum, min(cum, self.total)):
+            delivered += self.ack(seq)
+        self.cum = max(self.cum, cum)
+        for offset in range(1, min(highest - cum + 1, len(bitmap) * 8)):
+            if bitmap[offset // 8] & (0x80 >> (offset % 8)):
+                delivered += self.ack(cum + offset)
+        while self.cum < self.total and self.acked[self.cum]:
+            self.cum += 1
+        if delivered:
+            self.last_progress = now
+            self.interval_delivered += delivered
+
+        # A hole this far behind the newest ack was not repaired by FEC; resend it
+        min_age = self.srtt or 0.0
+        for seq in range(self.cum, highest - self.fec_group - REORDER_THRESHOLD + 1):
+            if not self.acked[seq] and seq not in self.queued and now - self.sent_at.get(seq, 0) > min_age:
+                self.lost.append(seq)
+                self.queued.add(seq)
+                self.interval_lost += 1
+
+        self.adjust_rate(now)
+        return delivered
+
+    def adjust_rate(self, now):
+        """
+        Paces to the measured delivery rate, backing off on congestion signals.
+
+        Congestion is either queueing delay (the interval's lowest RTT rising
+        well above the transfer's minimum) or unrepaired loss climbing above
+        its recent baseline. A steady level of random loss, which FEC and
+        selective retransmits are there to absorb, only raises the baseline.
+        """
+        elapsed = now - self.interval_start
+        if elapsed < max(self.srtt or 0.0, 0.05) or self.interval_sent < RATE_SAMPLE:
+            return
+        loss = self.interval_lost / max(1, self.interval_sent)
+        delivery_rate = self.interval_delivered / elapsed
+
+        queueing = (self.interval_rtt is not None
+                    and self.interval_rtt > self.min_rtt * DELAY_TOLERANCE + DELAY_SLACK)
+        lossy = loss > 2 * self.loss_baseline + LOSS_MARGIN
+        if queueing or lossy:
+            # Drain the queue: drop below what the path actually delivered
+            self.rate = max(MIN_RATE, min(self.rate, delivery_rate) * BACKOFF)
+        else:
+            # Probe, but never far beyond what the path has shown it can carry
+            ceiling = max(INITIAL_RATE, 2 * delivery_rate)
+            self.rate = min(MAX_RATE, ceiling, self.rate * RATE_GAIN)
+        if not queueing:
+            self.loss_baseline = min(LOSS_TOLERANCE, 0.875 * self.loss_baseline + 0.125 * loss)
+
+        self.interval_start = now
+        self.interval_sent = 0
+        self.interval_lost = 0
+        self.interval_delivered = 0
+        self.interval_rtt = None
+
+def _handshake(sock, channel, hello, addr, transfer_id):
+    """Sends HELLO until the receiver accepts or rejects; returns True if accepted."""
+    for _ in range(HANDSHAKE_RETRIES):
+        channel.sendto(hello, addr)
+        deadline = time.monotonic() + HANDSHAKE_TIMEOUT
+        while time.monotonic() < deadline:
+            if not select.select([sock], [], [], deadline - time.monotonic())[0]:
+                break
+            for data, _ in _drain(sock):
+                if len(data) < HEADER.size:
+                    continue
+                kind, tid, _ = HEADER.unpack_from(data)
+                if tid != transfer_id:
+                    continue
+                if kind == ACCEPT:
+                    return True
+                if kind == REJECT:
+                    print(f"[-] {addr[0]} declined the transfer.")
+                    return False
+    print(f"[-] No response from {addr[0]}. Make sure the receiver is running.")
+    return False
+
+
+def udp_file_sender(peer_ip, file_path, port=UDP_PORT, fec_group=FEC_GROUP, loss=0.0, latency=0.0, bandwidth=0):
+    """
+    Sends a file over the loss-tolerant datagram transport.
+
+    Chunks are encrypted individually, paced to an adaptive rate and
+    selectively acknowledged; with fec_group set, every group of chunks is
+    followed by an XOR parity packet so one loss per group is repaired
+    without a retransmit. loss, latency and bandwidth inject impairments
+    for testing (see LossyChannel).
+
+    Returns:
+        bool: True if the receiver confirmed the whole file.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.setblocking(False)
+        channel = _make_channel(s, loss, latency, bandwidth)
+        addr = (peer_ip, port)
+        try:
+            file_name = os.path.basename(file_path)
+            file_size = get_file_size(file_path)
+            problem = check_hello(file_size, CHUNK_SIZE, fec_group)
+            if problem:
+                print(f"[-] Cannot send '{file_name}' over UDP: {problem}.")
+                return False
+            transfer_id = random.getrandbits(32)
+            nonce_prefix = os.urandom(8)
+
+            name_bytes = file_name.encode('utf-8')
+            hello = (HEADER.pack(HELLO, transfer_id, 0)
+                     + HELLO_INFO.pack(file_size, CHUNK_SIZE, fec_group, nonce_prefix)
+                     + name_bytes)
+            if not _handshake(s, channel, hello, addr, transfer_id):
+                return False
+            print(f"[+] Connected to {peer_ip} (UDP)")
+
+            with open(file_path, 'rb') as f, \
+                    tqdm(total=file_size, unit='B', unit_scale=True, desc=file_name) as progress:
+                transfer = OutgoingTransfer(f, file_size, transfer_id, get_key(), nonce_prefix, fec_group)
+                last_heard = next_send = time.monotonic()
+
+                while not transfer.done:
+                    wait = max(0.0, next_send - time.monotonic())
+                    if select.select([s], [], [], wait)[0]:
+                        now = time.monotonic()
+                        for data, _ in _drain(s):
+                            if len(data) < HEADER.size:
+                                continue
+                            kind, tid, seq = HEADER.unpack_from(data)
+                            if tid != transfer_id:
+                                continue
+                            last_heard = now
+                            if kind == SACK:
+                                progress.update(transfer.on_sack(seq, data[HEADER.size:], now))
+                            elif kind == DONE:
+                                transfer.done = True
+
+                    now = time.monotonic()
+                    if now - last_heard > IDLE_TIMEOUT:
+                        print(f"\n[-] Lost contact with {peer_ip}; transfer aborted.")
+                        return False
+                    if transfer.done or now < next_send:
+                        continue
+
+                    packet = transfer.next_packet(now)
+                    if packet is None:
+                        next_send = now + SACK_INTERVAL / 4
+                        continue
+                    channel.sendto(packet, addr)
+                    next_send = max(next_send, now - BURST_ALLOWANCE) + len(packet) / transfer.rate
+
+                progress.update(file_size - progress.n)
+
+            print(f"\n[+] File '{file_name}' sent successfully.")
+            return True
+
+        except Exception as e:
+            print(f"[-] An error occurred: {e}")
+            return False
+
+
+class IncomingTransfer:
+    """Receiver-side state: which chunks arrived, FEC groups and the partial file."""
+
+    def __init__(self, transfer_id, file_size, chunk_size, fec_group, nonce_prefix, key, full_path):
+        self.transfer_id = transfer_id
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        self.fec_group = fec_group
+        self.nonce_prefix = nonce_prefix
+        self.key = key
+        self.full_path = full_path
+        # Unique per transfer, so two transfers of the same file name never share a partial file
+        self.part_path = f"{full_path}.{transfer_id:08x}.part"
+        self.total = chunk_count(file_size, chunk_size)
+        self.received = bytearray(self.total)
+        self.count = 0
+        self.cum = 0
+        self.highest = 0
+        self.last_seq = 0
+        self.groups = {}   # group -> {seq: payload} for groups that are not yet complete
+        self.parity = {}   # group -> parity payload
+        self.unacked = 0
+        self.last_ack = self.last_heard = time.monotonic()
+        self.file = open(self.part_path, 'wb')
+
+    @property
+    def complete(self):
+        return self.count == self.total
+
+    def payload_length(self, seq):
+        return min(self.chunk_size, self.file_size - seq * self.chunk_size) + TAG_SIZE
+
+    def group_members(self, group):
+        return range(group * self.fec_group, min((group + 1) * self.fec_group, self.total))
+
+    def store(self, seq, payload):
+        """Decrypts a chunk and writes it in place; returns False if it fails to verify."""
+        try:
+            data = decrypt_chunk(payload, self.key, self.nonce_prefix, seq)
+        except ValueError:
+            return False
+        self.file.seek(seq * self.chunk_size)
+        self.file.write(data)
+        self.received[seq] = 1
+        self.count += 1
+        self.highest = max(self.highest, seq)
+        while self.cum < self.total and self.received[self.cum]:
+            self.cum += 1
+        return True
+
+    def add_data(self, seq, payload):
+        self.last_seq = seq
+        if seq >= self.total or self.received[seq]:
+            return
+        if not self.store(seq, payload):
+            return
+        if self.fec_group:
+            group = seq // self.fec_group
+            self.groups.setdefault(group, {})[seq] = payload
+            self.try_recover(group)
+
+    def add_parity(self, group, parity):
+        members = self.group_members(group)
+        if not members or all(self.received[seq] for seq in members):
+            return
+        self.parity[group] = parity
+        self.try_recover(group)
+
+    def try_recover(self, group):
+        members = self.group_members(group)
+        missing = [seq for seq in members if not self.received[seq]]
+        if len(missing) == 1 and group in self.parity:
+            seq = missing[0]
+            present = [self.groups[group][other] for other in members if other != seq]
+            self.store(seq, recover_missing(self.parity[group], present, self.payload_length(seq)))
+            missing = [seq for seq in members if not self.received[seq]]
+        if not missing:
+            self.groups.pop(group, None)
+            self.parity.pop(group, None)
+
+    def sack(self):
+        """Builds a selective ack: everything below cum plus a bitmap of what arrived past it."""
+        bitmap = bytearray(WINDOW // 8)
+        for seq in range(self.cum + 1, min(self.highest + 1, self.cum + WINDOW)):
+            if self.received[seq]:
+                offset = seq - self.cum
+                bitmap[offset // 8] |= 0x80 >> (offset % 8)
+        self.unacked = 0
+        self.last_ack = time.monotonic()
+        return (HEADER.pack(SACK, self.transfer_id, self.cum)
+                + SACK_INFO.pack(self.highest, self.last_seq)
+                + bytes(bitmap))
+
+    def finish(self):
+        """Moves the finished file into place without replacing one that is already there."""
+        self.file.close()
+        self.full_path = unique_path(self.full_path)
+        os.replace(self.part_path, self.full_path)
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.remove(self.part_path)
+        except OSError:
+            pass
+
+
+def udp_file_receiver(port=UDP_PORT, save_path_func=None, on_file_received=None, on_transfer_request=None,
+                      on_transfer_progress=None, loss=0.0, latency=0.0, stop_event=None):
+    """Receives files sent with udp_file_sender, verifying and writing each chunk as it arrives."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    except OSError:
+        pass  # Keep the OS default buffer size
+    sock.bind((HOST, port))
+    sock.setblocking(False)
+    channel = _make_channel(sock, loss, latency)
+    print(f"[+] UDP file receiver listening on port {port}")
+
+    transfers = {}  # (addr, transfer id) -> IncomingTransfer
+    finished = {}   # (addr, transfer id) -> when it completed, so late packets get DONE again
+
+    def handle_hello(data, addr, key):
+        if key in transfers:
+            channel.sendto(HEADER.pack(ACCEPT, key[1], 0), addr)
+            return
+        file_size, chunk_size, fec_group, nonce_prefix = HELLO_INFO.unpack_from(data, HEADER.size)
+        problem = check_hello(file_size, chunk_size, fec_group)
+        if problem:
+            print(f"[-] Bad transfer request from {addr[0]}: {problem}")
+            channel.sendto(HEADER.pack(REJECT, key[1], 0), addr)
+            return
+        if len(transfers) >= MAX_TRANSFERS:
+            print(f"[-] Too many transfers in progress; rejected request from {addr[0]}")
+            channel.sendto(HEADER.pack(REJECT, key[1], 0), addr)
+            return
+        file_name = sanitize_filename(os.path.basename(data[HEADER.size + HELLO_INFO.size:].decode('utf-8')))
+        print(f"[+] Incoming file over UDP: {file_name} ({file_size} bytes) from {addr[0]}")
+
+        if on_transfer_request and not on_transfer_request(file_name, addr[0], file_size):
+            print(f"[-] Transfer of '{file_name}' from {addr[0]} rejected.")
+            channel.sendto(HEADER.pack(REJECT, key[1], 0), addr)
+            return
+
+        save_path = save_path_func() if save_path_func else get_save_path()
+        transfers[key] = IncomingTransfer(key[1], file_size, chunk_size, fec_group, nonce_prefix,
+                                          get_key(), os.path.join(save_path, file_name))
+        channel.sendto(HEADER.pack(ACCEPT, key[1], 0), addr)
+
+    def complete(transfer, addr, key):
+        del transfers[key]
+        try:
+            transfer.finish()
+        except OSError as e:
+            print(f"\n[-] Could not save file from {addr[0]}: {e}")
+            transfer.abort()
+            return
+        finished[key] = time.monotonic()
+        channel.sendto(HEADER.pack(DONE, key[1], transfer.total), addr)
+        file_name = os.path.basename(transfer.full_path)
+        print(f"\n[+] File '{file_name}' received successfully from {addr[0]} and saved to {transfer.full_path}")
+        if on_file_received:
+            on_file_received(file_name, addr[0])
+
+    try:
+        while stop_event is None or not stop_event.is_set():
+            select.select([sock], [], [], SACK_INTERVAL)
+            now = time.monotonic()
+            for data, addr in _drain(sock):
+                try:
+                    if len(data) < HEADER.size:
+                        continue
+                    kind, tid, seq = HEADER.unpack_from(data)
+                    key = (addr, tid)
+                    if key in finished:
+                        channel.sendto(HEADER.pack(DONE, tid, 0), addr)
+                        continue
+                    if kind == HELLO:
+                        try:
+                            handle_hello(data, addr, key)
+                        except (struct.error, UnicodeDecodeError, OSError) as e:
+                            print(f"[-] Bad transfer request from {addr}: {e}")
+                        continue
+                    transfer = transfers.get(key)
+                    if transfer is None:
+                        continue
+
+                    transfer.last_heard = now
+                    before = transfer.count
+                    if kind == DATA:
+                        transfer.add_data(seq, data[HEADER.size:])
+                    elif kind == PARITY:
+                        transfer.add_parity(seq, data[HEADER.size:])
+                    transfer.unacked += 1
+
+                    if transfer.complete:
+                        complete(transfer, addr, key)
+                    elif transfer.count != before and on_transfer_progress:
+                        on_transfer_progress(transfer.count / transfer.total)
+                except Exception as e:
+                    # One bad datagram must not take down the receiver for everyone else
+                    print(f"[-] Error handling packet from {addr}: {e}")
+
+            for (addr, tid), transfer in list(transfers.items()):
+                if transfer.unacked and (transfer.unacked >= SACK_EVERY or now - transfer.last_ack >= SACK_INTERVAL):
+                    try:
+                        channel.sendto(transfer.sack(), addr)
+                    except OSError:
+                        pass  # The next ack will try again
+                elif now - transfer.last_heard > IDLE_TIMEOUT:
+                    print(f"\n[-] UDP transfer from {addr[0]} timed out.")
+                    transfer.abort()
+                    del transfers[(addr, tid)]
+            for key, when in list(finished.items()):
+                if now - when > IDLE_TIMEOUT:
+                    del finished[key]
+    finally:
+        for transfer in transfers.values():
+            transfer.abort()
+        sock.close()
@@ -0,0 +1,83 @@
+import socket
+import pytest
+from src.chat_hub import ChatHub, fit_message, MAX_TEXT_SIZE
+from utils.framing import send_message, recv_message, MAX_MESSAGE_SIZE
+
+
+@pytest.fixture
+def hub():
+    hub = ChatHub(port=0, host='127.0.0.1')
+    hub.start()
+    hub.port = hub.server.sockets[0].getsockname()[1]
+    yield hub
+    hub.stop()
+
+
+def wait_for(sock, predicate):
+    """Reads messages until one matches predicate and returns it."""
+    while True:
+        message = recv_message(sock)
+        assert message is not None, "connection closed"
+        if predicate(message):
+            return message
+
+
+def connect(hub):
+    """Connects a client and waits until the hub has put it in the lobby."""
+    sock = socket.create_connection(('127.0.0.1', hub.port))
+    sock.settimeout(5)
+    host, port = sock.getsockname()
+    wait_for(sock, lambda m: m == f"* {host}:{port} joined lobby")
+    return sock
+
+
+def test_fit_message_truncates_to_one_frame():
+    message = fit_message("😀" * MAX_MESSAGE_SIZE)
+    assert len(message.encode('utf-8')) <= MAX_MESSAGE_SIZE
+    assert message.endswith('[truncated]')
+    assert fit_message("short") == "short"
+
+
+def test_relay_nick_and_join(hub):
+    with connect(hub) as a, connect(hub) as b:
+        send_message(a, "/nick alice")
+        wait_for(b, lambda m: "is now known as alice" in m)
+        send_message(b, "/nick bob")
+        wait_for(a, lambda m: "is now known as bob" in m)
+
+        send_message(a, "hello lobby")
+        assert wait_for(b, lambda m: m.startswith("[lobby]")) == "[lobby] alice: hello lobby"
+
+        send_message(a, "/join room")
+        wait_for(a, lambda m: m == "* alice joined room")
+        send_message(b, "/join room")
+        wait_for(a, lambda m: m == "* bob joined room")
+        send_message(b, "hi room")
+        assert wait_for(a, lambda m: m.startswith("[room]")) == "[room] bob: hi room"
+
+
+def test_message_too_long_keeps_session(hub):
+    with connect(hub) as a, connect(hub) as b:
+        send_message(a, "y" * (MAX_MESSAGE_SIZE - 5))
+        assert wait_for(a, lambda m: "Message too long" in m)
+
+        send_message(a, "still here")
+        assert wait_for(b, lambda m: m.startswith("[lobby]")).endswith(": still here")
+
+
+def test_multibyte_names_and_longest_text(hub):
+    with connect(hub) as a, connect(hub) as b:
+        send_message(a, "/nick " + "😀" * 32)
+        wait_for(a, lambda m: "Usage: /nick" in m)
+        send_message(a, "/join " + "😀" * 32)
+        wait_for(a, lambda m: "Usage: /join" in m)
+
+        send_message(a, "/nick " + "😀" * 8)
+        send_message(a, "/join " + "🎉" * 8)
+        wait_for(a, lambda m: m == f"* {'😀' * 8} joined {'🎉' * 8}")
+        send_message(b, "/join " + "🎉" * 8)
+        wait_for(a, lambda m: m.endswith("joined " + "🎉" * 8) and "😀" not in m)
+
+        send_message(a, "z" * MAX_TEXT_SIZE)
+        relayed = wait_for(b, lambda m: m.startswith("[" + "🎉" * 8))
+        assert relayed.endswith("z" * 100)
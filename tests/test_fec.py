@@ -0,0 +1,20 @@
+import os
+import pytest
+from utils.fec import xor_parity, recover_missing
+
+
+@pytest.mark.parametrize("missing", range(4))
+def test_recovers_any_single_missing_payload(missing):
+    payloads = [os.urandom(100), os.urandom(100), os.urandom(100), os.urandom(37)]
+    parity = xor_parity(payloads)
+    present = [p for i, p in enumerate(payloads) if i != missing]
+    assert recover_missing(parity, present, len(payloads[missing])) == payloads[missing]
+
+
+def test_parity_is_as_long_as_the_longest_payload():
+    assert len(xor_parity([b"ab", b"abcdef", b""])) == 6
+
+
+def test_recovers_empty_payload():
+    payloads = [b"data", b""]
+    assert recover_missing(xor_parity(payloads), [b"data"], 0) == b""
@@ -0,0 +1,77 @@
+import asyncio
+import socket
+import struct
+import pytest
+from utils.framing import (encode_message, send_message, recv_message, read_message,
+                           HEADER, MAX_MESSAGE_SIZE)
+
+
+def _read_all(data, eof=True):
+    """Runs read_message repeatedly over data fed into a StreamReader."""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        if eof:
+            reader.feed_eof()
+        messages = []
+        while True:
+            message = await read_message(reader)
+            if message is None:
+                return messages
+            messages.append(message)
+    return asyncio.run(run())
+
+
+def test_round_trip_over_socket():
+    a, b = socket.socketpair()
+    with a, b:
+        for message in ["hello", "", "ünïcödé ✓", "x" * 50000]:
+            send_message(a, message)
+            assert recv_message(b) == message
+
+
+def test_messages_merged_into_one_send():
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(encode_message("first") + encode_message("second") + encode_message("third"))
+        assert [recv_message(b) for _ in range(3)] == ["first", "second", "third"]
+
+
+def test_message_split_across_sends():
+    a, b = socket.socketpair()
+    with a, b:
+        frame = encode_message("split into single bytes")
+        for i in range(len(frame)):
+            a.send(frame[i:i + 1])
+        assert recv_message(b) == "split into single bytes"
+
+
+def test_recv_message_returns_none_on_eof():
+    a, b = socket.socketpair()
+    with b:
+        a.sendall(encode_message("last")[:-2])
+        a.close()
+        assert recv_message(b) is None
+
+
+def test_encode_rejects_oversized_message():
+    with pytest.raises(ValueError):
+        encode_message("y" * (MAX_MESSAGE_SIZE + 1))
+
+
+def test_read_message_round_trip_and_merged_frames():
+    data = encode_message("one") + encode_message("two")
+    assert _read_all(data) == ["one", "two"]
+
+
+def test_read_message_rejects_oversized_frame():
+    with pytest.raises(ValueError):
+        _read_all(HEADER.pack(MAX_MESSAGE_SIZE + 1) + b"y" * 10)
+
+
+@pytest.mark.parametrize("data", [
+    struct.pack('!H', 1),                        # Truncated header
+    HEADER.pack(10) + b"short",                  # Truncated payload
+])
+def test_read_message_returns_none_on_truncated_frame(data):
+    assert _read_all(data) == []
@@ -0,0 +1,96 @@
+import filecmp
+import io
+import os
+import socket
+import threading
+import pytest
+from src.udp_transfer import (IncomingTransfer, OutgoingTransfer, check_hello, chunk_count,
+                              udp_file_sender, udp_file_receiver, HEADER, CHUNK_SIZE,
+                              MAX_FILE_SIZE, WINDOW)
+from utils.crypto import encrypt_chunk, get_key
+from utils.fec import xor_parity
+
+NONCE = b'12345678'
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_incoming(tmp_path, data, fec_group=0):
+    return IncomingTransfer(1, len(data), CHUNK_SIZE, fec_group, NONCE, get_key(), str(tmp_path / 'out.bin'))
+
+
+def payload(data, seq):
+    return encrypt_chunk(data[seq * CHUNK_SIZE:(seq + 1) * CHUNK_SIZE], get_key(), NONCE, seq)
+
+
+def test_check_hello_bounds_chunk_count():
+    assert check_hello(10 * CHUNK_SIZE, CHUNK_SIZE, 8) is None
+    assert check_hello(MAX_FILE_SIZE, 1, 0) is not None
+    assert check_hello(100, 0, 8) is not None
+    assert check_hello(100, CHUNK_SIZE, WINDOW + 1) is not None
+    assert chunk_count(0) == 1
+
+
+def test_sack_bitmap_round_trip(tmp_path):
+    data = os.urandom(20 * CHUNK_SIZE)
+    incoming = make_incoming(tmp_path, data)
+    arrived = {0, 1, 2, 5, 7, 10, 19}
+    for seq in sorted(arrived):
+        incoming.add_data(seq, payload(data, seq))
+    assert incoming.cum == 3
+
+    packet = incoming.sack()
+    _, _, cum = HEADER.unpack_from(packet)
+    outgoing = OutgoingTransfer(io.BytesIO(data), len(data), 1, get_key(), NONCE, 0)
+    outgoing.next_new = outgoing.total
+    delivered = outgoing.on_sack(cum, packet[HEADER.size:], 0.0)
+
+    assert delivered == len(arrived) * CHUNK_SIZE
+    assert [seq for seq in range(outgoing.total) if outgoing.acked[seq]] == sorted(arrived)
+    assert outgoing.cum == 3
+    incoming.abort()
+
+
+def test_parity_repairs_one_lost_chunk(tmp_path):
+    data = os.urandom(3 * CHUNK_SIZE + 100)  # Last chunk is short
+    incoming = make_incoming(tmp_path, data, fec_group=4)
+    payloads = [payload(data, seq) for seq in range(4)]
+    for seq in (0, 1, 3):
+        incoming.add_data(seq, payloads[seq])
+    assert not incoming.complete
+
+    incoming.add_parity(0, xor_parity(payloads))
+    assert incoming.complete
+    incoming.finish()
+    with open(incoming.full_path, 'rb') as f:
+        assert f.read() == data
+
+
+@pytest.mark.parametrize("size", [0, 50 * CHUNK_SIZE + 17])
+@pytest.mark.parametrize("loss", [0.0, 0.05, 0.15])
+def test_transfer_over_lossy_channel(tmp_path, size, loss):
+    source = tmp_path / 'source.bin'
+    source.write_bytes(os.urandom(size))
+    out_dir = tmp_path / 'out'
+    out_dir.mkdir()
+
+    port = free_udp_port()
+    stop = threading.Event()
+    receiver = threading.Thread(
+        target=udp_file_receiver,
+        kwargs={'port': port, 'save_path_func': lambda: str(out_dir),
+                'loss': loss, 'latency': 0.002, 'stop_event': stop},
+        daemon=True
+    )
+    receiver.start()
+    try:
+        assert udp_file_sender('127.0.0.1', str(source), port=port, loss=loss, latency=0.002)
+    finally:
+        stop.set()
+        receiver.join()
+    assert os.listdir(out_dir) == ['source.bin']
+    assert filecmp.cmp(source, out_dir / 'source.bin', shallow=False)
@@ -0,0 +1,95 @@
+"""
+Compares file transfer throughput of the TCP path and the UDP transport over loopback.
+
+The UDP runs go through LossyChannel, so each one sees the requested loss and
+latency in both directions, and optionally a bandwidth-limited bottleneck queue
+on the data path. The TCP run cannot be impaired from user space; to compare it
+under the same conditions, add loss to the loopback interface with netem first
+(e.g. `tc qdisc add dev lo root netem loss 5% delay 10ms`).
+
+Usage:
+    python -m tools.bench_transfer --size 5 --loss 0 0.02 0.05 --latency 0.01 --bandwidth 1
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from src.client import file_sender, TCP_PORT
+from src.server import file_receiver
+from src.udp_transfer import udp_file_sender, udp_file_receiver, FEC_GROUP
+
+BENCH_UDP_PORT = 50103
+
+
+def bench_tcp(file_path, out_dir):
+    received = threading.Event()
+    threading.Thread(
+        target=file_receiver,
+        args=(TCP_PORT,),
+        kwargs={'save_path_func': lambda: out_dir, 'on_file_received': lambda *_: received.set()},
+        daemon=True
+    ).start()
+    time.sleep(0.2)
+
+    start = time.monotonic()
+    file_sender('127.0.0.1', file_path)
+    if not received.wait(60):
+        return None
+    return time.monotonic() - start
+
+
+def bench_udp(file_path, out_dir, loss, latency, bandwidth, fec_group):
+    stop = threading.Event()
+    receiver = threading.Thread(
+        target=udp_file_receiver,
+        kwargs={'port': BENCH_UDP_PORT, 'save_path_func': lambda: out_dir,
+                'loss': loss, 'latency': latency, 'stop_event': stop},
+        daemon=True
+    )
+    receiver.start()
+    time.sleep(0.2)
+
+    start = time.monotonic()
+    ok = udp_file_sender('127.0.0.1', file_path, port=BENCH_UDP_PORT, fec_group=fec_group,
+                         loss=loss, latency=latency, bandwidth=bandwidth)
+    elapsed = time.monotonic() - start
+    stop.set()
+    receiver.join()
+    return elapsed if ok else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=float, default=5, help="test file size in MB")
+    parser.add_argument('--loss', type=float, nargs='+', default=[0.0, 0.02, 0.05],
+                        help="packet loss rates to try for UDP")
+    parser.add_argument('--latency', type=float, default=0.01, help="one-way latency in seconds for UDP")
+    parser.add_argument('--bandwidth', type=float, default=0,
+                        help="UDP bottleneck bandwidth in MB/s (0 for unlimited)")
+    parser.add_argument('--fec', type=int, default=FEC_GROUP, help="chunks per parity packet (0 disables FEC)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        file_path = os.path.join(work_dir, 'bench.bin')
+        with open(file_path, 'wb') as f:
+            f.write(os.urandom(int(args.size * 1024 * 1024)))
+
+        results = [('TCP, unimpaired loopback', bench_tcp(file_path, tempfile.mkdtemp(dir=work_dir)))]
+        for loss in args.loss:
+            label = f"UDP, loss {loss:.0%}, latency {args.latency * 1000:.0f} ms, FEC {args.fec or 'off'}"
+            if args.bandwidth:
+                label += f", {args.bandwidth:g} MB/s bottleneck"
+            results.append((label, bench_udp(file_path, tempfile.mkdtemp(dir=work_dir), loss, args.latency,
+                                             int(args.bandwidth * 1024 * 1024), args.fec)))
+
+    print("\n--- RESULTS ---")
+    for label, elapsed in results:
+        if elapsed is None:
+            print(f"{label}: failed")
+        else:
+            print(f"{label}: {args.size / elapsed:.2f} MB/s ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
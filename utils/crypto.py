@@ -49,3 +49,33 @@ def decrypt_file(encrypted_data, key, nonce, tag, output_path):
     
     with open(output_path, 'wb') as f:
         f.write(decrypted_data)
+
+def encrypt_chunk(data, key, nonce_prefix, seq):
+    """
+    Encrypts one chunk of a datagram transfer using AES GCM mode.
+
+    Each chunk gets its own nonce (the transfer's 8-byte prefix plus the
+    chunk's sequence number), so chunks can be verified independently.
+
+    Args:
+        data (bytes): The plaintext chunk.
+        key (bytes): The encryption key.
+        nonce_prefix (bytes): The 8-byte per-transfer nonce prefix.
+        seq (int): The chunk's sequence number.
+
+    Returns:
+        bytes: The ciphertext followed by the authentication tag.
+    """
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce_prefix + seq.to_bytes(4, 'big'))
+    ciphertext, tag = cipher.encrypt_and_digest(data)
+    return ciphertext + tag
+
+def decrypt_chunk(payload, key, nonce_prefix, seq):
+    """
+    Decrypts and verifies one chunk produced by encrypt_chunk.
+
+    Raises:
+        ValueError: If the chunk was corrupted or tampered with.
+    """
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce_prefix + seq.to_bytes(4, 'big'))
+    return cipher.decrypt_and_verify(payload[:-TAG_SIZE], payload[-TAG_SIZE:])
@@ -0,0 +1,36 @@
+def xor_parity(payloads):
+    """
+    Builds an XOR parity block over a group of payloads.
+
+    Shorter payloads are treated as zero-padded to the longest one, so any
+    single missing payload in the group can be rebuilt with recover_missing.
+
+    Args:
+        payloads (list): The payloads (bytes) in the group.
+
+    Returns:
+        bytes: The parity block.
+    """
+    size = max(len(p) for p in payloads)
+    parity = 0
+    for payload in payloads:
+        parity ^= int.from_bytes(payload.ljust(size, b'\0'), 'big')
+    return parity.to_bytes(size, 'big')
+
+def recover_missing(parity, present, missing_size):
+    """
+    Rebuilds the one missing payload of a group from its parity block.
+
+    Args:
+        parity (bytes): The group's parity block.
+        present (list): Every other payload (bytes) in the group.
+        missing_size (int): The length of the missing payload.
+
+    Returns:
+        bytes: The recovered payload.
+    """
+    size = len(parity)
+    value = int.from_bytes(parity, 'big')
+    for payload in present:
+        value ^= int.from_bytes(payload.ljust(size, b'\0'), 'big')
+    return value.to_bytes(size, 'big')[:missing_size]
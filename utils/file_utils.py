@@ -28,6 +28,17 @@ def ensure_directory_exists(directory_path):
     return os.path.isdir(directory_path)
 
 
+def unique_path(path):
+    """Returns path, or 'name (N).ext' beside it if a file with that name already exists."""
+    if not os.path.exists(path):
+        return path
+    base, ext = os.path.splitext(path)
+    n = 1
+    while os.path.exists(f"{base} ({n}){ext}"):
+        n += 1
+    return f"{base} ({n}){ext}"
+
+
 def get_available_space(directory_path):
     """Get available space in the directory (in bytes)."""
     try:
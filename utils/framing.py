@@ -0,0 +1,57 @@
+import struct
+
+# Every message on a chat connection is a 4-byte big-endian length followed by
+# that many bytes of UTF-8 text, so messages are never split or merged.
+HEADER = struct.Struct('!I')
+MAX_MESSAGE_SIZE = 64 * 1024
+
+
+def encode_message(message):
+    """Returns the framed bytes for a text message."""
+    payload = message.encode('utf-8')
+    if len(payload) > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too long ({len(payload)} bytes, max {MAX_MESSAGE_SIZE})")
+    return HEADER.pack(len(payload)) + payload
+
+
+def _recv_exact(sock, size):
+    """Reads exactly size bytes from a socket, or returns None on EOF."""
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def send_message(sock, message):
+    """Sends one framed text message over a blocking socket."""
+    sock.sendall(encode_message(message))
+
+
+def recv_message(sock):
+    """Receives one framed text message from a blocking socket, or None on EOF."""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    length = HEADER.unpack(header)[0]
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Incoming message too long ({length} bytes)")
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        return None
+    return payload.decode('utf-8')
+
+
+async def read_message(reader):
+    """Reads one framed text message from an asyncio stream, or None on EOF."""
+    try:
+        header = await reader.readexactly(HEADER.size)
+        length = HEADER.unpack(header)[0]
+        if length > MAX_MESSAGE_SIZE:
+            raise ValueError(f"Incoming message too long ({length} bytes)")
+        payload = await reader.readexactly(length)
+    except EOFError:
+        return None
+    return payload.decode('utf-8')